@@ -121,6 +121,12 @@ class EELSConfig(t.HasTraits):
         guess_gos_path(),
         label='GOS directory',
         desc='The GOS files are required to create the EELS edge components')
+    gos_dtype = t.Enum(
+        ['float64', 'float32'],
+        label='GOS dtype',
+        desc='The dtype used to store the tabulated Hartree-Slater GOS. '
+        'float32 halves the memory use and is ample for the precision '
+        'of the tabulated values.')
 
 
 class GUIs(t.HasTraits):
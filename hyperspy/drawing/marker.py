@@ -19,7 +19,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from hyperspy.events import Event, Events
-import hyperspy.drawing._markers as markers
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -216,29 +215,43 @@ class MarkerBase(object):
         if render_figure:
             self._render_figure()
 
-# markers are imported in hyperspy.utils.markers
 def dict2marker(marker_dict, marker_name):
+    # The marker classes are imported here rather than at the top of the
+    # module to avoid a circular import
+    from hyperspy.drawing._markers.arrow import Arrow
+    from hyperspy.drawing._markers.ellipse import Ellipse
+    from hyperspy.drawing._markers.horizontal_line import HorizontalLine
+    from hyperspy.drawing._markers.horizontal_line_segment import \
+        HorizontalLineSegment
+    from hyperspy.drawing._markers.line_segment import LineSegment
+    from hyperspy.drawing._markers.point import Point
+    from hyperspy.drawing._markers.rectangle import Rectangle
+    from hyperspy.drawing._markers.text import Text
+    from hyperspy.drawing._markers.vertical_line import VerticalLine
+    from hyperspy.drawing._markers.vertical_line_segment import \
+        VerticalLineSegment
+
     marker_type = marker_dict['marker_type']
     if marker_type == 'Point':
-        marker = markers.point.Point(0, 0)
+        marker = Point(0, 0)
     elif marker_type == 'HorizontalLine':
-        marker = markers.horizontal_line.HorizontalLine(0)
+        marker = HorizontalLine(0)
     elif marker_type == 'HorizontalLineSegment':
-        marker = markers.horizontal_line_segment.HorizontalLineSegment(0, 0, 0)
+        marker = HorizontalLineSegment(0, 0, 0)
     elif marker_type == 'LineSegment':
-        marker = markers.line_segment.LineSegment(0, 0, 0, 0)
+        marker = LineSegment(0, 0, 0, 0)
     elif marker_type == 'Arrow':
-        marker = markers.arrow.Arrow(0, 0, 0, 0)
+        marker = Arrow(0, 0, 0, 0)
     elif marker_type == 'Rectangle':
-        marker = markers.rectangle.Rectangle(0, 0, 0, 0)
+        marker = Rectangle(0, 0, 0, 0)
     elif marker_type == 'Ellipse':
-        marker = markers.ellipse.Ellipse(0, 0, 0, 0)
+        marker = Ellipse(0, 0, 0, 0)
     elif marker_type == 'Text':
-        marker = markers.text.Text(0, 0, "")
+        marker = Text(0, 0, "")
     elif marker_type == 'VerticalLine':
-        marker = markers.vertical_line.VerticalLine(0)
+        marker = VerticalLine(0)
     elif marker_type == 'VerticalLineSegment':
-        marker = markers.vertical_line_segment.VerticalLineSegment(0, 0, 0)
+        marker = VerticalLineSegment(0, 0, 0)
     else:
         _log = logging.getLogger(__name__)
         _log.warning(
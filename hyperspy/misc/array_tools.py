@@ -22,7 +22,7 @@ import logging
 
 import dask.array as da
 import numpy as np
-from numba import njit
+from numba import njit, vectorize
 
 
 from hyperspy.misc.math_tools import anyfloatin
@@ -534,8 +534,18 @@ def numba_closest_index_ceil(axis_array, value_array):  # pragma: no cover
     return index_array
 
 
-@njit(cache=True)
-def round_half_towards_zero(array, decimals=0):  # pragma: no cover
+@vectorize(["float64(float64, int64)"], cache=True)
+def _round_half_towards_zero(value, decimals):  # pragma: no cover
+    # The float base keeps negative decimals valid (an int64 power
+    # would return NaN for them)
+    multiplier = 10.0 ** decimals
+    if value >= 0:
+        return math.ceil(value * multiplier - 0.5) / multiplier
+    else:
+        return math.floor(value * multiplier + 0.5) / multiplier
+
+
+def round_half_towards_zero(array, decimals=0):
     """
     Round input array using "half towards zero" strategy.
 
@@ -552,16 +562,21 @@ def round_half_towards_zero(array, decimals=0):  # pragma: no cover
     rounded_array : ndarray
         An array of the same type as a, containing the rounded values.
     """
-    multiplier = 10 ** decimals
+    return _round_half_towards_zero(array, decimals)
 
-    return np.where(array >= 0,
-                    np.ceil(array * multiplier - 0.5) / multiplier,
-                    np.floor(array * multiplier + 0.5) / multiplier
-                    )
 
+@vectorize(["float64(float64, int64)"], cache=True)
+def _round_half_away_from_zero(value, decimals):  # pragma: no cover
+    # The float base keeps negative decimals valid (an int64 power
+    # would return NaN for them)
+    multiplier = 10.0 ** decimals
+    if value >= 0:
+        return math.floor(value * multiplier + 0.5) / multiplier
+    else:
+        return math.ceil(value * multiplier - 0.5) / multiplier
 
-@njit(cache=True)
-def round_half_away_from_zero(array, decimals=0):  # pragma: no cover
+
+def round_half_away_from_zero(array, decimals=0):
     """
     Round input array using "half away from zero" strategy.
 
@@ -578,9 +593,4 @@ def round_half_away_from_zero(array, decimals=0):  # pragma: no cover
     rounded_array : ndarray
         An array of the same type as a, containing the rounded values.
     """
-    multiplier = 10 ** decimals
-
-    return np.where(array >= 0,
-                    np.floor(array * multiplier + 0.5) / multiplier,
-                    np.ceil(array * multiplier - 0.5) / multiplier
-                    )
+    return _round_half_away_from_zero(array, decimals)
@@ -18,10 +18,12 @@
 
 import logging
 import math
+import mmap
 from pathlib import Path
 
 import numpy as np
-from scipy import constants, integrate, interpolate
+from numba import njit
+from scipy import constants, interpolate
 
 from hyperspy.defaults_parser import preferences
 from hyperspy.misc.eels.base_gos import GOSBase
@@ -34,22 +36,65 @@ _logger = logging.getLogger(__name__)
 R = constants.value("Rydberg constant times hc in eV")
 a0 = constants.value("Bohr radius")
 
-# This dictionary accounts for conventions chosen in naming the data files, as well as normalisation.
+# Version of the binary sidecar files used to cache the parsed GOS
+# tables. Bump it whenever the stored representation changes.
+# Version 2: gos_array is stored as tabulated, without the division by R.
+_GOS_CACHE_VERSION = 2
+
+# This mapping of subshell -> (table, factor) accounts for conventions chosen
+# in naming the data files, as well as normalisation.
 # These cross sections contain only odd-number edges such as N3, or M5, and are normalised accordingly.
 # Other edges can be obtained as scaled copies of the provided ones.
-conventions = { 'K' : {'table': 'K1', 'factor': 1},
-                'L1': {'table': 'L1', 'factor': 1},
-                    'L2,3': {'table':'L3', 'factor': 3/2}, 'L2': {'table':'L3', 'factor': 1/2}, 'L3': {'table':'L3', 'factor': 1},
-                'M1': {'table': 'M1', 'factor': 1},
-                    'M2,3': {'table':'M3', 'factor': 3/2}, 'M2': {'table':'M3', 'factor': 1/2}, 'M3': {'table':'M3', 'factor': 1},
-                            'M4,5': {'table':'M5', 'factor': 5/3}, 'M4': {'table':'M5', 'factor': 2/3}, 'M5': {'table':'M5', 'factor': 1},
-                'N1': {'table': 'N1', 'factor': 1},
-                    'N2,3': {'table':'N3', 'factor': 3/2}, 'N2': {'table':'N3', 'factor': 1/2}, 'N3': {'table':'N3', 'factor': 1},
-                            'N4,5': {'table':'N5', 'factor': 5/3}, 'N4': {'table':'N5', 'factor': 2/3}, 'N5': {'table':'N5', 'factor': 1},
-                                'N6,7': {'table': 'N7', 'factor': 7/4}, 'N6': {'table':'N7', 'factor': 4/7}, 'N7': {'table':'N7', 'factor': 1},
-                'O1': {'table': 'O1', 'factor': 1},
-                    'O2,3': {'table':'O3', 'factor': 3/2}, 'O2': {'table':'O3', 'factor': 1/2}, 'O3': {'table':'O3', 'factor': 1},
-                        'O4,5': {'table':'O5', 'factor': 5/3}, 'O4': {'table':'O5', 'factor': 2/3}, 'O5': {'table':'O5', 'factor': 1}}
+_CONVENTIONS = {'K': ('K1', 1),
+                'L1': ('L1', 1),
+                    'L2,3': ('L3', 3/2), 'L2': ('L3', 1/2), 'L3': ('L3', 1),
+                'M1': ('M1', 1),
+                    'M2,3': ('M3', 3/2), 'M2': ('M3', 1/2), 'M3': ('M3', 1),
+                            'M4,5': ('M5', 5/3), 'M4': ('M5', 2/3), 'M5': ('M5', 1),
+                'N1': ('N1', 1),
+                    'N2,3': ('N3', 3/2), 'N2': ('N3', 1/2), 'N3': ('N3', 1),
+                            'N4,5': ('N5', 5/3), 'N4': ('N5', 2/3), 'N5': ('N5', 1),
+                                'N6,7': ('N7', 7/4), 'N6': ('N7', 4/7), 'N7': ('N7', 1),
+                'O1': ('O1', 1),
+                    'O2,3': ('O3', 3/2), 'O2': ('O3', 1/2), 'O3': ('O3', 1),
+                        'O4,5': ('O5', 5/3), 'O4': ('O5', 2/3), 'O5': ('O5', 1)}
+
+
+@njit(cache=True)
+def _integrate_rows(gos_array, logq, lo, hi, gosqmin, gosqmax,
+                    logqmin, logqmax, qint):  # pragma: no cover
+    """Trapezoidal integration of every GOS row over [qmin, qmax] in the
+    tabulated log-q grid, with linearly interpolated end corrections.
+
+    ``lo``/``hi`` are the indices of the first tabulated q point above
+    qmin and qmax for each row and ``gosqmin``/``gosqmax`` the GOS
+    interpolated at the integration limits. The result is written to
+    ``qint``. ``logq`` and the interpolated limits are float64, so the
+    accumulation is performed in float64 even when ``gos_array`` is
+    stored in float32.
+    """
+    # Processing one row at a time keeps the working set to the current
+    # row of gos_array plus the shared logq axis, which stays resident
+    # in L1 across rows; no explicit blocking of the reduction is needed
+    for i in range(gos_array.shape[0]):
+        l, h = lo[i], hi[i]
+        # h <= ncol always, and h > l implies l <= ncol - 1, so the row
+        # indexing below stays in range; when both limits lie beyond
+        # the tabulated q range (l == h == ncol) only the extrapolated
+        # limit values are used.
+        if h > l:
+            acc = 0.5 * (gosqmin[i] + gos_array[i, l]) * \
+                (logq[l] - logqmin[i])
+            for j in range(l, h - 1):
+                acc += 0.5 * (gos_array[i, j] + gos_array[i, j + 1]) * \
+                    (logq[j + 1] - logq[j])
+            acc += 0.5 * (gos_array[i, h - 1] + gosqmax[i]) * \
+                (logqmax[i] - logq[h - 1])
+        else:
+            # Both limits fall within the same tabulated interval
+            acc = 0.5 * (gosqmin[i] + gosqmax[i]) * \
+                (logqmax[i] - logqmin[i])
+        qint[i] = acc
 
 
 class HartreeSlaterGOS(GOSBase):
@@ -63,16 +108,20 @@ class HartreeSlaterGOS(GOSBase):
         Usually a string, for example, 'Ti_L3' for the GOS of the titanium L3
         subshell. If a dictionary is passed, it is assumed that Hartree Slater
         GOS was exported using `GOS.as_dictionary`, and will be reconstructed.
+    dtype : numpy dtype or None
+        The dtype used to store the tabulated GOS. If None (default), the
+        value of ``preferences.EELS.gos_dtype`` is used.
 
     Methods
     -------
     readgosfile()
         Read the GOS files of the element subshell from the location
         defined in Preferences.
-    get_qaxis_and_gos(ienergy, qmin, qmax)
-        given the energy axis index and qmin and qmax values returns
-        the qaxis and gos between qmin and qmax using linear
-        interpolation to include qmin and qmax in the range.
+    integrateq(onset_energy, angle, E0)
+        Integrate the tabulated GOS over q between the kinematic limits
+        of every tabulated energy at once, trimming the q range with a
+        vectorized search and linear interpolation of the limit values
+        rather than slicing row by row.
 
     Attributes
     ----------
@@ -88,21 +137,29 @@ class HartreeSlaterGOS(GOSBase):
 
     _name = 'Hartree-Slater'
 
-    def __init__(self, element_subshell):
+    def __init__(self, element_subshell, dtype=None):
         """
         Parameters
         ----------
 
         element_subshell : str
             For example, 'Ti_L3' for the GOS of the titanium L3 subshell
+        dtype : numpy dtype or None
+            The dtype used to store the tabulated GOS. If None (default),
+            the value of ``preferences.EELS.gos_dtype`` is used.
 
         """
+        if dtype is None:
+            dtype = preferences.EELS.gos_dtype
+        self._dtype = np.dtype(dtype)
         self._whitelist = {'gos_array': None,
                            'rel_energy_axis': None,
                            'qaxis': None,
                            'element': None,
                            'subshell': None
                            }
+        self._integrateq_cache = {}
+        self._qint_buf = None
         if isinstance(element_subshell, dict):
             self.element = element_subshell['element']
             self.subshell = element_subshell['subshell']
@@ -115,18 +172,35 @@ class HartreeSlaterGOS(GOSBase):
 
     def _load_dictionary(self, dictionary):
         load_from_dictionary(self, dictionary)
+        # Dictionaries store the GOS in the historical divided-by-R
+        # convention for compatibility with models saved by earlier
+        # versions; convert back to the raw tabulated representation
+        # expected by `integrateq`. The q integration walks gos_array
+        # row by row, so it must be stored row-major (C order); arrays
+        # loaded from a dictionary are not guaranteed to be contiguous.
+        self.gos_array = np.ascontiguousarray(self.gos_array * R,
+                                              dtype=self._dtype)
         self.energy_axis = self.rel_energy_axis + self.onset_energy
+        # qaxis[0] is always 0, so the first value is -inf; it is never
+        # read because the integration range starts at qmin > 0
+        with np.errstate(divide='ignore'):
+            self._log_qaxis_sq = np.log((a0 * self.qaxis) ** 2)
+        self._integrateq_cache.clear()
 
     def as_dictionary(self, fullcopy=True):
         """Export the GOS as a dictionary.
         """
         dic = {}
         export_to_dictionary(self, self._whitelist, dic, fullcopy)
+        # Keep the exported gos_array in the historical divided-by-R
+        # convention so that the dictionaries remain interchangeable
+        # with those saved by earlier versions
+        dic['gos_array'] = dic['gos_array'] / R
         return dic
 
     def read_elements(self):
         super().read_elements()
-        self.subshell_factor = conventions[self.subshell]['factor']
+        self.subshell_factor = _CONVENTIONS[self.subshell][1]
 
     def readgosfile(self):
         _logger.info(
@@ -137,7 +211,7 @@ class HartreeSlaterGOS(GOSBase):
         )
         element = self.element
         subshell = self.subshell
-        table = conventions[subshell]['table']
+        table = _CONVENTIONS[subshell][0]
 
         # Check if the Peter Rez's Hartree Slater GOS distributed by
         # Gatan are available. Otherwise exit
@@ -156,55 +230,195 @@ class HartreeSlaterGOS(GOSBase):
                 "`preferences.EELS.eels_gos_files_path`."
             )
 
-        with open(gos_file) as f:
-            GOS_list = f.read().replace('\r', '').split()
+        if not self._read_gos_cache(gos_file):
+            self._parse_gos_file(gos_file)
+            self._write_gos_cache(gos_file)
+        # The table is parsed and cached in float64; cast it to the
+        # requested storage precision only afterwards. The tabulated
+        # values carry ~4 significant digits, so float32 is ample.
+        # gos_array is kept row-major (C order) because the q
+        # integration accesses it row by row.
+        self.gos_array = self.gos_array.astype(self._dtype, copy=False)
+        self.energy_axis = self.rel_energy_axis + self.onset_energy
+        # The integration in `integrateq` is performed in this fixed
+        # log grid; precompute it once per table. qaxis[0] is always 0,
+        # so the first value is -inf; it is never read because the
+        # integration range starts at qmin > 0.
+        with np.errstate(divide='ignore'):
+            self._log_qaxis_sq = np.log((a0 * self.qaxis) ** 2)
+        self._integrateq_cache.clear()
+
+    def _parse_gos_file(self, gos_file):
+        """Parse a tabulated GOS text file, setting the ``gos_array``,
+        ``qaxis`` and ``rel_energy_axis`` attributes."""
+        with open(gos_file, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Only the first 9 whitespace-separated tokens are header
+            # values and they sit in the first lines of the file.
+            # Collect them line by line instead of splitting the whole
+            # token stream, then hand the rest of the map, which is the
+            # numeric body of the table, to numpy's C tokenizer in a
+            # single slice. The mapped file is parsed as bytes, so it
+            # is never decoded to str.
+            header = []
+            while len(header) < 9:
+                line = mm.readline()
+                if not line:
+                    raise ValueError(f"GOS file {gos_file} is truncated.")
+                header.extend(line.split())
+            gos_values = np.fromstring(mm[mm.tell():], dtype=np.float64,
+                                       sep=' ')
+        if len(header) > 9:
+            # The last header line also contained the first numeric
+            # values of the body
+            gos_values = np.concatenate(
+                (np.array(header[9:], dtype=np.float64), gos_values))
 
         # Map the parameters
-        info1_1 = float(GOS_list[2])
-        info1_2 = float(GOS_list[3])
-        ncol = int(GOS_list[5])
-        info2_1 = float(GOS_list[6])
-        info2_2 = float(GOS_list[7])
-        nrow = int(GOS_list[8])
-        self.gos_array = np.array(GOS_list[9:], dtype=float)
-        # The division by R is not in the equations, but it seems that
-        # the the GOS was tabulated this way
-        self.gos_array = self.gos_array.reshape(nrow, ncol) / R
-        del GOS_list
+        info1_1 = float(header[2])
+        info1_2 = float(header[3])
+        ncol = int(header[5])
+        info2_1 = float(header[6])
+        info2_2 = float(header[7])
+        nrow = int(header[8])
+        # The GOS is tabulated in units of R; instead of dividing the
+        # whole table by R here, the factor is folded into the
+        # prefactor of `integrateq`
+        self.gos_array = gos_values.reshape(nrow, ncol)
 
         # Calculate the scale of the matrix
         self.rel_energy_axis = self.get_parametrized_energy_axis(
             info2_1, info2_2, nrow)
         self.qaxis = self.get_parametrized_qaxis(
             info1_1, info1_2, ncol)
-        self.energy_axis = self.rel_energy_axis + self.onset_energy
+
+    def _read_gos_cache(self, gos_file):
+        """Load the parsed GOS arrays from the binary sidecar of
+        `gos_file` if an up-to-date one exists.
+
+        Returns True on success, False if the sidecar is missing or
+        stale, in which case the text file needs to be parsed.
+        """
+        cache_file = gos_file.with_suffix(gos_file.suffix + '.npz')
+        if not cache_file.is_file():
+            return False
+        stat = gos_file.stat()
+        try:
+            with np.load(cache_file) as cache:
+                if (cache['version'] != _GOS_CACHE_VERSION or
+                        cache['mtime'] != stat.st_mtime or
+                        cache['size'] != stat.st_size):
+                    return False
+                self.gos_array = cache['gos_array']
+                self.qaxis = cache['qaxis']
+                self.rel_energy_axis = cache['rel_energy_axis']
+        except Exception:
+            # A corrupted or unreadable sidecar is not fatal: the text
+            # file remains authoritative
+            _logger.debug(f"Discarding unreadable GOS cache {cache_file}")
+            return False
+        return True
+
+    def _write_gos_cache(self, gos_file):
+        """Cache the parsed GOS arrays in a binary sidecar of `gos_file`
+        to skip the text parsing on the next load."""
+        cache_file = gos_file.with_suffix(gos_file.suffix + '.npz')
+        stat = gos_file.stat()
+        try:
+            np.savez(cache_file,
+                     version=_GOS_CACHE_VERSION,
+                     mtime=stat.st_mtime,
+                     size=stat.st_size,
+                     gos_array=self.gos_array,
+                     qaxis=self.qaxis,
+                     rel_energy_axis=self.rel_energy_axis)
+        except OSError:
+            # The GOS files may live in a read-only location
+            _logger.debug(f"Could not write GOS cache {cache_file}")
 
     def integrateq(self, onset_energy, angle, E0):
+        # Model fitting calls this method many times with identical
+        # arguments (e.g. once per pixel of a map), so the result is
+        # memoised. The key is quantized to make the float hashing
+        # robust to round-off noise in the arguments.
+        key = (round(onset_energy, 6), round(angle, 9), round(E0, 3))
+        cached = self._integrateq_cache.get(key)
+        if cached is not None:
+            self.energy_shift, self.qint, interpolator = cached
+            return interpolator
         energy_shift = onset_energy - self.onset_energy
         self.energy_shift = energy_shift
-        qint = np.zeros((self.energy_axis.shape[0]))
         # Calculate the cross section at each energy position of the
         # tabulated GOS
         gamma = 1 + E0 / 511.06
         T = 511060 * (1 - 1 / gamma ** 2) / 2
-        for i in range(0, self.gos_array.shape[0]):
-            E = self.energy_axis[i] + energy_shift
-            # Calculate the limits of the q integral
-            qa0sqmin = (E ** 2) / (4 * R * T) + (E ** 3) / (
-                8 * gamma ** 3 * R * T ** 2)
-            p02 = T / (R * (1 - 2 * T / 511060))
-            pp2 = p02 - E / R * (gamma - E / 1022120)
-            qa0sqmax = qa0sqmin + 4 * np.sqrt(p02 * pp2) * \
-                (math.sin(angle / 2)) ** 2
-            qmin = math.sqrt(qa0sqmin) / a0
-            qmax = math.sqrt(qa0sqmax) / a0
-            # Perform the integration in a log grid
-            qaxis, gos = self.get_qaxis_and_gos(i, qmin, qmax)
-            logsqa0qaxis = np.log((a0 * qaxis) ** 2)
-            qint[i] = integrate.simps(gos, logsqa0qaxis)
         E = self.energy_axis + energy_shift
-        # Energy differential cross section in (barn/eV/atom)
-        qint *= (4.0 * np.pi * a0 ** 2.0 * R ** 2 / E / T *
-                 self.subshell_factor) * 1e28
+        # Calculate the limits of the q integral for all the tabulated
+        # energies at once, with the scalar subexpressions hoisted out
+        # of the array arithmetic
+        inv_a0 = 1.0 / a0
+        inv_4RT = 1.0 / (4 * R * T)
+        inv_8g3RT2 = 1.0 / (8 * gamma ** 3 * R * T ** 2)
+        sin2 = math.sin(angle / 2) ** 2
+        qa0sqmin = E ** 2 * inv_4RT + E ** 3 * inv_8g3RT2
+        p02 = T / (R * (1 - 2 * T / 511060))
+        pp2 = p02 - E / R * (gamma - E / 1022120)
+        qa0sqmax = qa0sqmin + 4 * np.sqrt(p02 * pp2) * sin2
+        qmin = np.sqrt(qa0sqmin) * inv_a0
+        qmax = np.sqrt(qa0sqmax) * inv_a0
+        # Perform the integration in a log grid for all the tabulated
+        # energies at once. Since (a0 * qmin) ** 2 == qa0sqmin, the
+        # integration limits in the log grid are simply the log of the
+        # reduced q limits.
+        gos = self.gos_array
+        ncol = self.qaxis.shape[0]
+        rows = np.arange(gos.shape[0])
+        logq = self._log_qaxis_sq
+        logqmin = np.log(qa0sqmin)
+        logqmax = np.log(qa0sqmax)
+        # Indices of the first tabulated q point above qmin and qmax for
+        # every row, each located with a single vectorized bisection
+        # instead of per-row searches
+        lo = self.qaxis.searchsorted(qmin)
+        hi = self.qaxis.searchsorted(qmax)
+        # GOS at the integration limits by linear interpolation in q, as
+        # in `get_qaxis_and_gos`. The indices are clipped to the last
+        # tabulated point so that limits beyond the tabulated q range
+        # are linearly extrapolated from the last two points (for qmin
+        # that can only happen at extreme energy shifts, in which case
+        # the whole integral reduces to the extrapolated trapezoid
+        # below). The tabulated GOS is non-negative, so only the
+        # interpolated values need to be clipped.
+        ilo = np.minimum(lo, ncol - 1)
+        q1, q2 = self.qaxis[ilo - 1], self.qaxis[ilo]
+        g1, g2 = gos[rows, ilo - 1], gos[rows, ilo]
+        gosqmin = (g1 + (g2 - g1) * (qmin - q1) / (q2 - q1)).clip(0)
+        ihi = np.minimum(hi, ncol - 1)
+        q1, q2 = self.qaxis[ihi - 1], self.qaxis[ihi]
+        g1, g2 = gos[rows, ihi - 1], gos[rows, ihi]
+        gosqmax = (g1 + (g2 - g1) * (qmax - q1) / (q2 - q1)).clip(0)
+        # Trapezoidal rule over the tabulated points inside [qmin, qmax]
+        # plus the end corrections, compiled as a single kernel over all
+        # rows
+        # The raw row integrals go to a scratch buffer that is reused
+        # across calls; applying the prefactor below produces the fresh
+        # array that is stored and returned
+        if self._qint_buf is None or self._qint_buf.shape[0] != gos.shape[0]:
+            self._qint_buf = np.empty(gos.shape[0])
+        _integrate_rows(gos, logq, lo, hi, gosqmin, gosqmax,
+                        logqmin, logqmax, self._qint_buf)
+        # Energy differential cross section in (barn/eV/atom). One
+        # factor of R of the original R ** 2 prefactor cancels the R
+        # scaling of the tabulated GOS, which is kept in its raw
+        # representation at load time.
+        qint = self._qint_buf * ((4.0 * np.pi * a0 ** 2.0 * R / T *
+                                  self.subshell_factor * 1e28) / E)
         self.qint = qint
-        return interpolate.interp1d(E, qint, kind=3)
+        # CubicSpline is both faster to construct and to evaluate than
+        # interp1d(kind=3)
+        interpolator = interpolate.CubicSpline(E, qint, extrapolate=False)
+        if len(self._integrateq_cache) >= 64:
+            # Drop the oldest entry to bound the memory use
+            self._integrateq_cache.pop(next(iter(self._integrateq_cache)))
+        self._integrateq_cache[key] = (energy_shift, qint, interpolator)
+        return interpolator
@@ -235,3 +235,25 @@ def test_round_half_away_from_zero():
         round_half_away_from_zero(a, decimals=1),
         np.array([-2.0, -1.6, -1.6, -1.5, -0.2, 0.0, 0.2, 1.5, 1.6, 1.6, 2.0])
         )
+
+
+@pytest.mark.parametrize('decimals', [-1, 0, 1])
+def test_round_half_towards_zero_large_array(decimals):
+    # Exercise the vectorized implementation on a large array
+    a = np.random.default_rng(123).uniform(-100, 100, size=10**6)
+    m = 10 ** decimals
+    np.testing.assert_allclose(
+        round_half_towards_zero(a, decimals=decimals),
+        np.where(a >= 0, np.ceil(a * m - 0.5) / m, np.floor(a * m + 0.5) / m)
+        )
+
+
+@pytest.mark.parametrize('decimals', [-1, 0, 1])
+def test_round_half_away_from_zero_large_array(decimals):
+    # Exercise the vectorized implementation on a large array
+    a = np.random.default_rng(123).uniform(-100, 100, size=10**6)
+    m = 10 ** decimals
+    np.testing.assert_allclose(
+        round_half_away_from_zero(a, decimals=decimals),
+        np.where(a >= 0, np.floor(a * m + 0.5) / m, np.ceil(a * m - 0.5) / m)
+        )
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Copyright 2007-2022 The HyperSpy developers
+#
+# This file is part of HyperSpy.
+#
+# HyperSpy is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# HyperSpy is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with HyperSpy. If not, see <https://www.gnu.org/licenses/#GPL>.
+
+import os
+
+import numpy as np
+import pytest
+
+from hyperspy.defaults_parser import preferences
+from hyperspy.misc.eels.hartree_slater_gos import HartreeSlaterGOS
+
+# Only the 9 leading whitespace-separated tokens of a GOS file are
+# header values: tokens 2, 3 and 5 parametrize the q axis and tokens
+# 6, 7 and 8 the energy axis. The rest is the numeric body of the
+# table.
+INFO1_1, INFO1_2, NCOL = 0.1, 0.05, 4
+INFO2_1, INFO2_2, NROW = 50.0, 3.0, 5
+BODY = np.arange(1.0, NROW * NCOL + 1)
+
+
+def _write_gos_file(gos_file, body=BODY, newline='\n', split_header=False):
+    header = ['Ti', 'L3', str(INFO1_1), str(INFO1_2), '0', str(NCOL),
+              str(INFO2_1), str(INFO2_2), str(NROW)]
+    body = ['%.4f' % v for v in body]
+    if split_header:
+        # The line carrying the last header tokens also carries the
+        # first numeric values of the body
+        lines = [' '.join(header[:6]),
+                 ' '.join(header[6:] + body[:2]),
+                 ' '.join(body[2:])]
+    else:
+        lines = [' '.join(header[:6]),
+                 ' '.join(header[6:]),
+                 ' '.join(body)]
+    # Write as bytes to keep the requested line endings on all platforms
+    gos_file.write_bytes((newline.join(lines) + newline).encode())
+
+
+@pytest.fixture
+def gos_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(preferences.EELS, 'eels_gos_files_path',
+                        str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+@pytest.mark.parametrize('split_header', [True, False])
+def test_parse_gos_file(gos_path, newline, split_header):
+    _write_gos_file(gos_path / 'Ti.L3', newline=newline,
+                    split_header=split_header)
+    gos = HartreeSlaterGOS('Ti_L3')
+    np.testing.assert_allclose(gos.gos_array, BODY.reshape(NROW, NCOL))
+    np.testing.assert_allclose(
+        gos.qaxis,
+        INFO1_1 * (np.exp(np.arange(NCOL) * INFO1_2) - 1) * 1e10)
+    np.testing.assert_allclose(
+        gos.rel_energy_axis,
+        INFO2_1 * (np.exp(np.arange(NROW) * INFO2_2 / INFO2_1) - 1))
+
+
+def test_parse_gos_file_truncated(gos_path):
+    (gos_path / 'Ti.L3').write_bytes(b'Ti L3 0.1\n')
+    with pytest.raises(ValueError):
+        HartreeSlaterGOS('Ti_L3')
+
+
+def test_gos_cache_reload(gos_path):
+    gos_file = gos_path / 'Ti.L3'
+    _write_gos_file(gos_file)
+    gos = HartreeSlaterGOS('Ti_L3')
+    cache_file = gos_path / 'Ti.L3.npz'
+    assert cache_file.is_file()
+    # Rewrite the source with different values but identical size and
+    # mtime: the sidecar is still considered up to date and must be the
+    # one that is read
+    stat = gos_file.stat()
+    _write_gos_file(gos_file, body=BODY[::-1])
+    os.utime(gos_file, (stat.st_atime, stat.st_mtime))
+    gos2 = HartreeSlaterGOS('Ti_L3')
+    np.testing.assert_allclose(gos2.gos_array, gos.gos_array)
+    np.testing.assert_allclose(gos2.qaxis, gos.qaxis)
+    np.testing.assert_allclose(gos2.rel_energy_axis, gos.rel_energy_axis)
+
+
+def test_gos_cache_stale(gos_path):
+    gos_file = gos_path / 'Ti.L3'
+    _write_gos_file(gos_file)
+    HartreeSlaterGOS('Ti_L3')
+    # Changing the source mtime invalidates the sidecar
+    stat = gos_file.stat()
+    _write_gos_file(gos_file, body=BODY + 1)
+    os.utime(gos_file, (stat.st_atime, stat.st_mtime + 1))
+    gos = HartreeSlaterGOS('Ti_L3')
+    np.testing.assert_allclose(gos.gos_array, (BODY + 1).reshape(NROW, NCOL))
+
+
+def test_gos_cache_corrupt(gos_path):
+    gos_file = gos_path / 'Ti.L3'
+    _write_gos_file(gos_file)
+    HartreeSlaterGOS('Ti_L3')
+    # A corrupted sidecar is discarded and the text file re-parsed
+    (gos_path / 'Ti.L3.npz').write_bytes(b'not a valid npz file')
+    gos = HartreeSlaterGOS('Ti_L3')
+    np.testing.assert_allclose(gos.gos_array, BODY.reshape(NROW, NCOL))
@@ -28,34 +28,40 @@ Example
 
 """
 
-from hyperspy.drawing._markers.horizontal_line import \
-    HorizontalLine as horizontal_line
-from hyperspy.drawing._markers.horizontal_line_segment import \
-    HorizontalLineSegment as horizontal_line_segment
-from hyperspy.drawing._markers.line_segment import LineSegment as line_segment
-from hyperspy.drawing._markers.point import Point as point
-from hyperspy.drawing._markers.rectangle import Rectangle as rectangle
-from hyperspy.drawing._markers.text import Text as text
-from hyperspy.drawing._markers.vertical_line import \
-    VerticalLine as vertical_line
-from hyperspy.drawing._markers.vertical_line_segment import \
-    VerticalLineSegment as vertical_line_segment
-from hyperspy.drawing._markers.arrow import Arrow as arrow
-from hyperspy.drawing._markers.ellipse import Ellipse as ellipse
-
-
-__all__ = [
-    'arrow',
-    'ellipse',
-    'horizontal_line',
-    'horizontal_line_segment',
-    'line_segment',
-    'point',
-    'rectangle',
-    'text',
-    'vertical_line',
-    'vertical_line_segment',
-    ]
+import importlib
+
+
+# The marker classes are imported lazily to avoid triggering the import
+# of matplotlib, which they drag in transitively, until a marker is
+# actually used
+_MARKERS_MAPPING = {
+    'arrow': ('hyperspy.drawing._markers.arrow', 'Arrow'),
+    'ellipse': ('hyperspy.drawing._markers.ellipse', 'Ellipse'),
+    'horizontal_line': (
+        'hyperspy.drawing._markers.horizontal_line', 'HorizontalLine'),
+    'horizontal_line_segment': (
+        'hyperspy.drawing._markers.horizontal_line_segment',
+        'HorizontalLineSegment'),
+    'line_segment': ('hyperspy.drawing._markers.line_segment', 'LineSegment'),
+    'point': ('hyperspy.drawing._markers.point', 'Point'),
+    'rectangle': ('hyperspy.drawing._markers.rectangle', 'Rectangle'),
+    'text': ('hyperspy.drawing._markers.text', 'Text'),
+    'vertical_line': (
+        'hyperspy.drawing._markers.vertical_line', 'VerticalLine'),
+    'vertical_line_segment': (
+        'hyperspy.drawing._markers.vertical_line_segment',
+        'VerticalLineSegment'),
+    }
+
+
+__all__ = sorted(_MARKERS_MAPPING)
+
+
+def __getattr__(name):
+    if name in _MARKERS_MAPPING:
+        module, class_name = _MARKERS_MAPPING[name]
+        return getattr(importlib.import_module(module), class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def __dir__():